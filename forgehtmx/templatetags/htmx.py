@@ -1,7 +1,5 @@
-import json
-
 from django import template
-from django.template.base import TextNode
+from django.utils.safestring import mark_safe
 
 register = template.Library()
 
@@ -18,31 +16,31 @@ def htmx_js(context):
 
 
 class HTMXFragmentNode(template.Node):
+    # template.Node doesn't use slots, so instances still get a __dict__
+    # (for token, origin, etc.) but our own attributes stay out of it
+    __slots__ = ("fragment_name", "lazy", "nodelist", "_open", "_close", "_lazy_html")
+
     def __init__(self, fragment_name, nodelist, lazy, *args, **kwargs):
         self.fragment_name = fragment_name
         self.lazy = lazy
-        self.nodelist = template.NodeList(
-            [
-                TextNode(
-                    f'<div fhx-fragment="{fragment_name}" hx-swap="outerHTML" hx-target="this" hx-indicator="this">'
-                )
-            ]
-            + nodelist
-            + [TextNode("</div>")]
+        self.nodelist = nodelist
+
+        # The wrapper is constant per node, so build it once at parse time
+        self._open = mark_safe(
+            f'<div fhx-fragment="{fragment_name}" hx-swap="outerHTML" hx-target="this" hx-indicator="this">'
         )
+        self._close = mark_safe("</div>")
+        self._lazy_html = mark_safe(
+            f'<div hx-get hx-trigger="fhxLoad from:body" fhx-fragment="{fragment_name}" hx-swap="outerHTML" hx-target="this" hx-indicator="this"></div>'
+        )
+
         super().__init__(*args, **kwargs)
 
     def render(self, context, allow_lazy=True):
         if allow_lazy and self.lazy:
-            return template.NodeList(
-                [
-                    TextNode(
-                        f'<div hx-get hx-trigger="fhxLoad from:body" fhx-fragment="{self.fragment_name}" hx-swap="outerHTML" hx-target="this" hx-indicator="this"></div>'
-                    ),
-                ]
-            ).render(context)
-
-        return self.nodelist.render(context)
+            return self._lazy_html
+
+        return self._open + self.nodelist.render(context) + self._close
 
 
 @register.tag
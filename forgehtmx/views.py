@@ -1,13 +1,57 @@
-import re
+from functools import cached_property
 
-from django.template.context import make_context
+from django.template.context import Context, make_context
 from django.template.loader_tags import ExtendsNode
 from django.template.response import TemplateResponse
 
 from .templatetags.htmx import HTMXFragmentNode
 
 
+def _find_fragments(nodelist):
+    # Same traversal order as Node.get_nodes_by_type(), but with a stack
+    fragments = {}
+    stack = list(reversed(nodelist))
+
+    while stack:
+        node = stack.pop()
+
+        if isinstance(node, HTMXFragmentNode):
+            # The first fragment with a given name wins
+            fragments.setdefault(node.fragment_name, node)
+
+        for attr in reversed(node.child_nodelists):
+            child_nodelist = getattr(node, attr, None)
+            if child_nodelist:
+                stack.extend(reversed(child_nodelist))
+
+    return fragments
+
+
+def _get_fragment_map(template_base):
+    # Stored on the template, so cached templates only get walked once
+    fragment_map = getattr(template_base, "_fhx_fragment_map", None)
+    if fragment_map is not None:
+        return fragment_map
+
+    if len(template_base.nodelist) == 1 and isinstance(
+        template_base.nodelist[0], ExtendsNode
+    ):
+        # If the template extends another,
+        # the whole thing is wrapped in ExtendsNode
+        nodelist = template_base.nodelist[0].nodelist
+    else:
+        nodelist = template_base.nodelist
+
+    fragment_map = _find_fragments(nodelist)
+    template_base._fhx_fragment_map = fragment_map
+    return fragment_map
+
+
 class HTMXTemplateFragmentResponse(TemplateResponse):
+    # Set to False on a subclass to render fragments without running
+    # the engine's context processors (request, csrf_token, etc. won't be available)
+    use_request_context = True
+
     def __init__(self, htmx_fragment_name, *args, **kwargs):
         self.htmx_fragment_name = htmx_fragment_name
         super().__init__(*args, **kwargs)
@@ -15,33 +59,34 @@ class HTMXTemplateFragmentResponse(TemplateResponse):
     @property
     def rendered_content(self) -> str:
         template = self.resolve_template(self.template_name)
-        context = self.resolve_context(self.context_data)
 
         # The base template obj is wrapped in DjangoTemplate, etc.
         template_base = template.template
 
-        if len(template_base.nodelist) == 1 and isinstance(
-            template_base.nodelist[0], ExtendsNode
-        ):
-            # If the template extends another,
-            # the whole thing is wrapped in ExtendsNode
-            nodelist = template_base.nodelist[0].nodelist
-        else:
-            nodelist = template_base.nodelist
-
         target_fragment_name = self.htmx_fragment_name
 
-        for node in nodelist.get_nodes_by_type(HTMXFragmentNode):
-            if node.fragment_name == target_fragment_name:
-                # Render the node by itself, so we don't mess
-                # with the template stored in memory
-                context = make_context(context, self._request)
-                with context.bind_template(template_base):
-                    context.template_name = template_base.name
-                    return node.render(
-                        context,
-                        allow_lazy=False,  # We're rendeirng a single fragment, so lazy is not allowed at this point
-                    )
+        node = _get_fragment_map(template_base).get(target_fragment_name)
+        if node is not None:
+            # Render the node by itself, so we don't mess
+            # with the template stored in memory
+            if self.use_request_context:
+                context = make_context(
+                    self.context_data,
+                    self._request,
+                    autoescape=template_base.engine.autoescape,
+                )
+            else:
+                # Skip the context processors and only use the view's context
+                context = Context(
+                    self.context_data,
+                    autoescape=template_base.engine.autoescape,
+                )
+            with context.bind_template(template_base):
+                context.template_name = template_base.name
+                return node.render(
+                    context,
+                    allow_lazy=False,  # We're rendeirng a single fragment, so lazy is not allowed at this point
+                )
 
         raise ValueError(
             f"HTMX fragment {target_fragment_name} not found in template {template_base.name}"
@@ -52,34 +97,63 @@ class HTMXViewMixin:
     htmx_template_name = ""
     htmx_fragment_response_class = HTMXTemplateFragmentResponse
 
+    # Maps (HTTP method, action name) to htmx_ handler method names,
+    # built once per class so dispatch doesn't need to assemble names
+    _htmx_handlers = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        http_method_names = getattr(cls, "http_method_names", [])
+        cls._htmx_handlers = {}
+
+        for name in dir(cls):
+            if not name.startswith("htmx_") or not callable(getattr(cls, name)):
+                continue
+
+            http_method, sep, action_name = name[5:].partition("_")
+            if sep and not action_name:
+                # htmx_get_ is not the same handler as htmx_get
+                continue
+
+            if http_method in http_method_names:
+                cls._htmx_handlers[(http_method.upper(), action_name)] = name
+
     def render_to_response(self, context, **response_kwargs):
-        if self.is_htmx_request and self.htmx_fragment_name:
-            response_kwargs.setdefault("content_type", self.content_type)
-            return self.htmx_fragment_response_class(
-                htmx_fragment_name=self.htmx_fragment_name,
-                # The regular kwargs
-                request=self.request,
-                template=self.get_template_names(),
-                context=context,
-                using=self.template_engine,
-                **response_kwargs,
-            )
-
-        return super().render_to_response(context, **response_kwargs)
-
-    def dispatch(self, *args, **kwargs):
+        if not self.is_htmx_request:
+            return super().render_to_response(context, **response_kwargs)
+
+        htmx_fragment_name = self.htmx_fragment_name
+        if not htmx_fragment_name:
+            return super().render_to_response(context, **response_kwargs)
+
+        response_kwargs.setdefault("content_type", self.content_type)
+        return self.htmx_fragment_response_class(
+            htmx_fragment_name=htmx_fragment_name,
+            # The regular kwargs
+            request=self.request,
+            template=self.get_template_names(),
+            context=context,
+            using=self.template_engine,
+            **response_kwargs,
+        )
+
+    def dispatch(self, request, *args, **kwargs):
         if self.is_htmx_request:
             # You can use an htmx_{method} method on views
             # (or htmx_{method}_{action} for specific actions)
-            method = f"htmx_{self.request.method.lower()}"
-            if self.htmx_action_name:
-                method += f"_{self.htmx_action_name}"
+            method = self._htmx_handlers.get((request.method, self.htmx_action_name))
+            if method is None:
+                # Not defined on the class, but could still be set dynamically
+                method = f"htmx_{request.method.lower()}"
+                if self.htmx_action_name:
+                    method += f"_{self.htmx_action_name}"
 
             handler = getattr(self, method, None)
             if handler:
-                return handler(*args, **kwargs)
+                return handler(request, *args, **kwargs)
 
-        return super().dispatch(*args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
 
     def get_template_names(self):
         # TODO is this part necessary anymore?? can I replace those with fragments now?
@@ -89,21 +163,23 @@ class HTMXViewMixin:
 
             default_template_names = super().get_template_names()
             return [
-                re.sub(r"\.html$", "_htmx.html", template_name)
+                template_name[:-5] + "_htmx.html"
+                if template_name.endswith(".html")
+                else template_name
                 for template_name in default_template_names
             ] + default_template_names  # Fallback to the defaults so you don't need _htmx.html
 
         return super().get_template_names()
 
-    @property
+    @cached_property
     def is_htmx_request(self):
-        return self.request.headers.get("HX-Request") == "true"
+        return self.request.META.get("HTTP_HX_REQUEST") == "true"
 
-    @property
+    @cached_property
     def htmx_fragment_name(self):
         # A custom header that we pass with the {% htmxfragment %} tag
-        return self.request.headers.get("FHX-Fragment", "")
+        return self.request.META.get("HTTP_FHX_FRAGMENT", "")
 
-    @property
+    @cached_property
     def htmx_action_name(self):
-        return self.request.headers.get("FHX-Action", "")
+        return self.request.META.get("HTTP_FHX_ACTION", "")
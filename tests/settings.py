@@ -2,4 +2,40 @@ INSTALLED_APPS = [
     "forgehtmx",
 ]
 
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+            ],
+            "loaders": [
+                (
+                    "django.template.loaders.locmem.Loader",
+                    {
+                        "base.html": "<html>{% block content %}{% endblock %}</html>",
+                        "page.html": (
+                            '{% extends "base.html" %}{% load htmx %}'
+                            "{% block content %}"
+                            "<h1>Title</h1>"
+                            "{% htmxfragment main %}<p>{{ name }}</p>{% endhtmxfragment %}"
+                            "{% endblock %}"
+                        ),
+                        "request.html": (
+                            "{% load htmx %}"
+                            "{% htmxfragment main %}{{ request.path }}{% endhtmxfragment %}"
+                        ),
+                        "nested.html": (
+                            "{% load htmx %}"
+                            "{% if show %}{% for i in items %}{% endfor %}"
+                            "{% else %}{% htmxfragment inner %}{{ name }}{% endhtmxfragment %}"
+                            "{% endif %}"
+                        ),
+                    },
+                ),
+            ],
+        },
+    },
+]
+
 USE_TZ = True
@@ -0,0 +1,63 @@
+import pytest
+from django.template import Context, Engine, TemplateSyntaxError
+from django.utils.safestring import SafeString
+
+from forgehtmx.templatetags.htmx import HTMXFragmentNode
+
+engine = Engine(libraries={"htmx": "forgehtmx.templatetags.htmx"})
+
+
+def test_htmxfragment():
+    template = engine.from_string(
+        "{% load htmx %}{% htmxfragment main %}<p>{{ name }}</p>{% endhtmxfragment %}"
+    )
+    assert (
+        template.render(Context({"name": "<b>"}))
+        == '<div fhx-fragment="main" hx-swap="outerHTML" hx-target="this" hx-indicator="this"><p>&lt;b&gt;</p></div>'
+    )
+
+
+def test_htmxfragment_lazy():
+    template = engine.from_string(
+        "{% load htmx %}{% htmxfragment main lazy %}<p>{{ name }}</p>{% endhtmxfragment %}"
+    )
+    assert (
+        template.render(Context({"name": "<b>"}))
+        == '<div hx-get hx-trigger="fhxLoad from:body" fhx-fragment="main" hx-swap="outerHTML" hx-target="this" hx-indicator="this"></div>'
+    )
+
+
+def test_htmxfragment_quoted_name():
+    template = engine.from_string(
+        '{% load htmx %}{% htmxfragment "my frag" %}<p>{{ name }}</p>{% endhtmxfragment %}'
+    )
+    assert template.render(Context({"name": "Dave"})).startswith(
+        '<div fhx-fragment="my frag" '
+    )
+
+
+@pytest.mark.parametrize(
+    "tag",
+    [
+        "{% htmxfragment %}",
+        "{% htmxfragment main eager %}",
+        "{% htmxfragment main lazy extra %}",
+    ],
+)
+def test_htmxfragment_syntax_error(tag):
+    with pytest.raises(TemplateSyntaxError):
+        engine.from_string("{% load htmx %}" + tag + "{% endhtmxfragment %}")
+
+
+def test_htmxfragment_render_is_safe():
+    template = engine.from_string(
+        "{% load htmx %}{% htmxfragment main lazy %}<p>{{ name }}</p>{% endhtmxfragment %}"
+    )
+    (node,) = template.nodelist.get_nodes_by_type(HTMXFragmentNode)
+    context = Context({"name": "<b>"})
+
+    # The lazy placeholder
+    assert isinstance(node.render(context), SafeString)
+
+    # The wrapped fragment body
+    assert isinstance(node.render(context, allow_lazy=False), SafeString)
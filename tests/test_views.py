@@ -1,7 +1,14 @@
+import pytest
 from django.http import HttpResponse
+from django.template.loader import get_template
 from django.views import View
+from django.views.generic import TemplateView
 
-from forgehtmx.views import HTMXViewMixin
+from forgehtmx.views import (
+    HTMXTemplateFragmentResponse,
+    HTMXViewMixin,
+    _get_fragment_map,
+)
 
 
 class V(HTMXViewMixin, View):
@@ -16,6 +23,18 @@ def test_is_htmx_request(rf):
     assert view.is_htmx_request
 
 
+def test_is_not_htmx_request(rf):
+    request = rf.get("/")
+    view = V()
+    view.setup(request)
+    assert not view.is_htmx_request
+
+    request = rf.get("/", HTTP_HX_REQUEST="false")
+    view = V()
+    view.setup(request)
+    assert not view.is_htmx_request
+
+
 def test_fhx_fragment(rf):
     request = rf.get("/", HTTP_FHX_FRAGMENT="main")
     view = V()
@@ -28,3 +47,146 @@ def test_fhx_action(rf):
     view = V()
     view.setup(request)
     assert view.htmx_action_name == "create"
+
+
+def test_fragment_response(rf):
+    request = rf.get("/", HTTP_HX_REQUEST="true", HTTP_FHX_FRAGMENT="main")
+    response = HTMXTemplateFragmentResponse(
+        htmx_fragment_name="main",
+        request=request,
+        template="page.html",
+        context={"name": "Dave"},
+    )
+    response.render()
+    assert (
+        response.content
+        == b'<div fhx-fragment="main" hx-swap="outerHTML" hx-target="this" hx-indicator="this"><p>Dave</p></div>'
+    )
+
+
+def test_fragment_response_missing(rf):
+    request = rf.get("/", HTTP_HX_REQUEST="true", HTTP_FHX_FRAGMENT="missing")
+    response = HTMXTemplateFragmentResponse(
+        htmx_fragment_name="missing",
+        request=request,
+        template="page.html",
+        context={},
+    )
+    with pytest.raises(ValueError):
+        response.render()
+
+
+def test_htmx_template_names(rf):
+    class TV(HTMXViewMixin, TemplateView):
+        template_name = "page.html"
+
+    request = rf.get("/", HTTP_HX_REQUEST="true")
+    view = TV()
+    view.setup(request)
+    assert view.get_template_names() == ["page_htmx.html", "page.html"]
+
+
+def test_fragment_response_nested(rf):
+    request = rf.get("/", HTTP_HX_REQUEST="true", HTTP_FHX_FRAGMENT="inner")
+    response = HTMXTemplateFragmentResponse(
+        htmx_fragment_name="inner",
+        request=request,
+        template="nested.html",
+        context={"name": "Dave"},
+    )
+    response.render()
+    assert (
+        response.content
+        == b'<div fhx-fragment="inner" hx-swap="outerHTML" hx-target="this" hx-indicator="this">Dave</div>'
+    )
+
+
+def test_htmx_action_dispatch_dynamic(rf):
+    class DV(HTMXViewMixin, View):
+        def get(self, request):
+            return HttpResponse("get")
+
+    # Added after the class was created, so it isn't in the handler table
+    DV.htmx_get_refresh = lambda self, request: HttpResponse("htmx_get_refresh")
+
+    request = rf.get("/", HTTP_HX_REQUEST="true", HTTP_FHX_ACTION="refresh")
+    response = DV.as_view()(request)
+    assert response.content == b"htmx_get_refresh"
+
+
+def test_render_to_response(rf):
+    class TV(HTMXViewMixin, TemplateView):
+        template_name = "page.html"
+
+    request = rf.get("/")
+    response = TV.as_view()(request, name="Dave")
+    assert not isinstance(response, HTMXTemplateFragmentResponse)
+
+    request = rf.get("/", HTTP_HX_REQUEST="true", HTTP_FHX_FRAGMENT="main")
+    response = TV.as_view()(request, name="Dave")
+    assert isinstance(response, HTMXTemplateFragmentResponse)
+    response.render()
+    assert b"<h1>" not in response.content
+
+
+def test_fragment_map_cached():
+    template_base = get_template("page.html").template
+    fragment_map = _get_fragment_map(template_base)
+    assert list(fragment_map) == ["main"]
+    assert _get_fragment_map(template_base) is fragment_map
+
+
+def test_htmx_action_dispatch(rf):
+    class AV(HTMXViewMixin, View):
+        def get(self, request):
+            return HttpResponse("get")
+
+        def htmx_get(self, request):
+            return HttpResponse("htmx_get")
+
+        def htmx_get_(self, request):
+            return HttpResponse("htmx_get_")
+
+        def htmx_post_create_item(self, request):
+            return HttpResponse("htmx_post_create_item")
+
+    response = AV.as_view()(rf.get("/"))
+    assert response.content == b"get"
+
+    response = AV.as_view()(rf.get("/", HTTP_HX_REQUEST="true"))
+    assert response.content == b"htmx_get"
+
+    request = rf.post("/", HTTP_HX_REQUEST="true", HTTP_FHX_ACTION="create_item")
+    response = AV.as_view()(request)
+    assert response.content == b"htmx_post_create_item"
+
+    # No handler, so it falls through to the regular dispatch
+    request = rf.post("/", HTTP_HX_REQUEST="true", HTTP_FHX_ACTION="missing")
+    response = AV.as_view()(request)
+    assert response.status_code == 405
+
+
+def test_fragment_response_without_request_context(rf):
+    class FragmentResponse(HTMXTemplateFragmentResponse):
+        use_request_context = False
+
+    request = rf.get("/path/", HTTP_HX_REQUEST="true", HTTP_FHX_FRAGMENT="main")
+
+    # The request context processor runs by default
+    response = HTMXTemplateFragmentResponse(
+        htmx_fragment_name="main",
+        request=request,
+        template="request.html",
+        context={},
+    )
+    response.render()
+    assert b"/path/" in response.content
+
+    response = FragmentResponse(
+        htmx_fragment_name="main",
+        request=request,
+        template="request.html",
+        context={},
+    )
+    response.render()
+    assert b"/path/" not in response.content